@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
 import secrets
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+import httpx
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from pydantic import BaseModel, Field
 
-from scraper import split_inputs, normalize_to_casinos, scrape_links
+from scraper import DEFAULT_HEADERS, split_inputs, normalize_to_casinos, scrape_links
 from sheets_writer import write_results
 
 
+logger = logging.getLogger(__name__)
+
+SCRAPE_CONCURRENCY = 16
+SCRAPE_TIMEOUT_S = 20.0
+
 security = HTTPBasic()
 
 def require_auth(credentials: HTTPBasicCredentials = Depends(security)) -> None:
@@ -31,7 +40,28 @@ def require_auth(credentials: HTTPBasicCredentials = Depends(security)) -> None:
         )
 
 
-app = FastAPI(title="Casinos.com Link Scraper")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # One pooled HTTP/2 client for the whole process; same-host fetches multiplex
+    # over a shared connection instead of paying DNS/TCP/TLS per request.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        headers=DEFAULT_HEADERS,
+        follow_redirects=True,
+        timeout=SCRAPE_TIMEOUT_S,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+
+app = FastAPI(
+    title="Casinos.com Link Scraper",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 
 class ScrapeRequest(BaseModel):
@@ -44,6 +74,21 @@ class ScrapeRequest(BaseModel):
     )
 
 
+def write_results_in_background(
+    spreadsheet_id: str,
+    internal_blocks: List[Tuple[str, Dict[str, List[str]]]],
+    external_blocks: List[Tuple[str, Dict[str, List[str]]]],
+) -> None:
+    """
+    Runs after the response is sent (sync, so Starlette puts it on its threadpool);
+    failures can only be logged at this point.
+    """
+    try:
+        write_results(spreadsheet_id, internal_blocks, external_blocks)
+    except Exception:
+        logger.exception("Failed to write to Google Sheets %s", spreadsheet_id)
+
+
 def gather_inputs(req: ScrapeRequest) -> List[str]:
     if req.urls:
         return [u.strip() for u in req.urls if u and u.strip()]
@@ -53,7 +98,7 @@ def gather_inputs(req: ScrapeRequest) -> List[str]:
 
 
 @app.post("/scrape", dependencies=[Depends(require_auth)])
-async def scrape(req: ScrapeRequest) -> Dict[str, Any]:
+async def scrape(req: ScrapeRequest, request: Request, bg: BackgroundTasks) -> Dict[str, Any]:
     urls_in = gather_inputs(req)
 
     if not (1 <= len(urls_in) <= 150):
@@ -70,33 +115,44 @@ async def scrape(req: ScrapeRequest) -> Dict[str, Any]:
         except Exception as e:
             errors.append(f"{u} -> {e}")
 
+    # Different spellings (us/slots, /us/slots/, full URL) share one canonical URL.
+    normalized = list(dict.fromkeys(normalized))
+
     if not normalized:
         raise HTTPException(status_code=400, detail={"message": "No valid casinos.com URLs/paths.", "errors": errors})
 
     internal_blocks = []
     external_blocks = []
 
-    for u in normalized:
-        try:
-            page = await scrape_links(u, ignore_header_footer=req.ignore_header_footer)
-            internal_blocks.append((page.source_url, page.internal))
-            external_blocks.append((page.source_url, page.external))
-        except Exception as e:
+    client: httpx.AsyncClient = request.app.state.http
+    sem = asyncio.Semaphore(SCRAPE_CONCURRENCY)
+
+    async def run(u: str):
+        async with sem:
+            return await scrape_links(u, client=client, ignore_header_footer=req.ignore_header_footer)
+
+    results = await asyncio.gather(*[run(u) for u in normalized], return_exceptions=True)
+
+    # gather preserves input order, so blocks stay in the order the URLs were pasted
+    for u, page in zip(normalized, results):
+        if isinstance(page, BaseException):
             internal_blocks.append((u, {}))
             external_blocks.append((u, {}))
-            errors.append(f"Failed to scrape {u}: {e}")
+            errors.append(f"Failed to scrape {u}: {page}")
+        else:
+            internal_blocks.append((page.source_url, page.internal))
+            external_blocks.append((page.source_url, page.external))
+            errors.extend(f"{page.source_url}: {w}" for w in page.warnings)
 
     spreadsheet_id = os.environ.get("GSHEETS_SPREADSHEET_ID")
     if not spreadsheet_id:
         raise HTTPException(status_code=500, detail="Missing env var GSHEETS_SPREADSHEET_ID")
 
-    try:
-        write_results(spreadsheet_id, internal_blocks, external_blocks)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to write to Google Sheets: {e}")
+    bg.add_task(write_results_in_background, spreadsheet_id, internal_blocks, external_blocks)
 
     return {
         "ok": True,
+        "status": "writing",
         "input_count": len(urls_in),
         "normalized_count": len(normalized),
         "errors": errors,
@@ -322,7 +378,8 @@ us/blackjack"></textarea>
               `Input count: ${data.input_count}\\n` +
               `Normalized: ${data.normalized_count}` +
               errs +
-              "\\n\\nCheck your Google Sheet tabs: INTERNAL_LINKS and EXTERNAL_LINKS.",
+              "\\n\\nThe Google Sheet tabs INTERNAL_LINKS and EXTERNAL_LINKS are being updated " +
+              "and should refresh within a few seconds.",
               true
             );
           }
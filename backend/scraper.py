@@ -1,44 +1,67 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+import asyncio
+import codecs
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 
 import httpx
-from bs4 import BeautifulSoup
+import lxml.etree
+import lxml.html
+
+from utils import cached_urlparse
 
 
 BASE = "https://www.casinos.com/"
 INTERNAL_HOSTS = {"www.casinos.com", "casinos.com"}
 
+_ANCHORS_XPATH = lxml.etree.XPath("//a[@href]")
+# Anchors inside <header>, <footer> or <nav> are dropped by libxml2 in a single tree walk.
+_ANCHORS_OUTSIDE_HF_XPATH = lxml.etree.XPath(
+    "//a[@href][not(ancestor::header or ancestor::footer or ancestor::nav)]"
+)
+
+# Inputs may be separated by newlines, spaces, tabs, commas or semicolons.
+_SPLIT_RE = re.compile(r"[\s,;]+")
+
+# An in-document encoding declaration; libxml2 honours these (and BOMs) on its own.
+_DECLARED_CHARSET_RE = re.compile(rb"<meta[^>]+charset|<\?xml[^>]+encoding", re.IGNORECASE)
+_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+_SKIP_PREFIXES = ("#", "javascript:", "mailto:", "tel:")
+
+# Pages beyond this size are truncated; lxml still recovers the links read so far.
+MAX_BODY_BYTES = 10_000_000
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; EFCT-LinkScraper/1.0)",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Encoding": "br, gzip",
+}
+
 
 def split_inputs(raw: str) -> List[str]:
-    raw = raw.strip()
-    if not raw:
-        return []
-    for sep in [",", "\t", ";"]:
-        raw = raw.replace(sep, "\n")
-    parts = []
-    for line in raw.splitlines():
-        for token in line.strip().split():
-            if token.strip():
-                parts.append(token.strip())
-    return parts
+    return [t for t in _SPLIT_RE.split(raw.strip()) if t]
 
 
 def normalize_to_casinos(url_or_path: str) -> str:
     s = url_or_path.strip()
     if s.startswith("/"):
-        return urljoin(BASE, s.lstrip("/"))
-    if "://" not in s and s.startswith("www."):
+        s = urljoin(BASE, s.lstrip("/"))
+    elif "://" not in s and s.startswith("www."):
         s = "https://" + s
-    if "://" not in s:
-        return urljoin(BASE, s.lstrip("/"))
+    elif "://" not in s:
+        s = urljoin(BASE, s.lstrip("/"))
 
     parsed = urlparse(s)
     host = (parsed.netloc or "").lower()
     if host in INTERNAL_HOSTS:
-        normalized = f"https://{host}{parsed.path or '/'}"
+        # Canonical form: no fragment, no trailing slash, so equivalent inputs dedupe.
+        path = parsed.path.rstrip("/") or "/"
+        normalized = f"https://{host}{path}"
         if parsed.query:
             normalized += f"?{parsed.query}"
         return normalized
@@ -46,15 +69,10 @@ def normalize_to_casinos(url_or_path: str) -> str:
     raise ValueError(f"Non-casinos.com URL not allowed: {s}")
 
 
-def is_internal(href: str) -> bool:
-    parsed = urlparse(href)
-    if not parsed.netloc:
-        return True
-    return parsed.netloc.lower() in INTERNAL_HOSTS
-
-
 def extract_anchor_text(a_tag) -> str:
-    text = a_tag.get_text(" ", strip=True)
+    # Join text nodes with a space so <span>Foo</span><span>Bar</span> and Foo<br>Bar
+    # read "Foo Bar", as bs4's get_text(" ", strip=True) did.
+    text = " ".join(" ".join(a_tag.itertext()).split())
     if text:
         return text
     for attr in ("aria-label", "title"):
@@ -69,63 +87,132 @@ class PageLinks:
     source_url: str
     internal: Dict[str, List[str]]
     external: Dict[str, List[str]]
+    # Things the caller should surface, e.g. a skipped or truncated body.
+    warnings: List[str] = field(default_factory=list)
 
 
-def _is_in_header_footer_nav(a_tag) -> bool:
+def _known_charset(charset: Optional[str]) -> Optional[str]:
     """
-    True if the <a> is inside header/footer/nav.
+    The header charset if libxml2 accepts it, else None so lxml falls back to <meta>.
     """
+    if not charset:
+        return None
     try:
-        return a_tag.find_parent(["header", "footer", "nav"]) is not None
-    except Exception:
-        return False
+        lxml.html.HTMLParser(encoding=charset)
+    except LookupError:
+        return None
+    return charset
 
 
-async def scrape_links(
+async def _fetch(
+    client: httpx.AsyncClient,
     source_url: str,
-    timeout_s: float = 20.0,
-    ignore_header_footer: bool = False,
-) -> PageLinks:
-    headers = {
-        "User-Agent": "Mozilla/5.0 (compatible; EFCT-LinkScraper/1.0)",
-        "Accept": "text/html,application/xhtml+xml",
-    }
+) -> Tuple[bytes, Optional[str], Optional[str]]:
+    """
+    Stream source_url, returning (body, charset, warning).
 
-    async with httpx.AsyncClient(headers=headers, follow_redirects=True, timeout=timeout_s) as client:
-        r = await client.get(source_url)
+    Non-HTML responses yield an empty body; oversized ones are cut at MAX_BODY_BYTES.
+    Either case sets warning. There is no up-front Content-Length check: with br/gzip
+    it is the compressed size, so only the decoded byte count is comparable to the cap.
+    """
+    async with client.stream("GET", source_url) as r:
         r.raise_for_status()
 
-    soup = BeautifulSoup(r.text, "lxml")
-
-    internal_map: Dict[str, set[str]] = {}
-    external_map: Dict[str, set[str]] = {}
-
-    for a in soup.select("a[href]"):
-        if ignore_header_footer and _is_in_header_footer_nav(a):
-            continue
-
+        ctype = r.headers.get("content-type", "").lower()
+        if ctype and "html" not in ctype:
+            return b"", None, f"skipped non-HTML ({ctype.split(';')[0].strip()})"
+
+        chunks: List[bytes] = []
+        total = 0
+        warning = None
+        async for chunk in r.aiter_bytes():
+            room = MAX_BODY_BYTES - total
+            if len(chunk) > room:
+                chunks.append(chunk[:room])
+                warning = f"truncated at {MAX_BODY_BYTES // 1_000_000} MB"
+                break
+            chunks.append(chunk)
+            total += len(chunk)
+        charset = _known_charset(r.charset_encoding)
+
+    return b"".join(chunks), charset, warning
+
+
+def _parse(
+    body_slot: List[bytes],
+    charset: Optional[str],
+    source_url: str,
+    ignore_header_footer: bool,
+) -> PageLinks:
+    # The body comes in a one-item list that we empty, so once lxml has built the
+    # tree nothing else holds the bytes and they can be freed mid-parse.
+    body = body_slot.pop()
+    empty = PageLinks(source_url=source_url, internal={}, external={})
+    if not body or body.isspace():  # .strip() would copy up to MAX_BODY_BYTES
+        return empty
+
+    # Parse from bytes so lxml honours the declared charset (header first, then <meta>).
+    # With neither, libxml2 would assume Latin-1; keep httpx's old UTF-8 default instead.
+    if charset is None and not body.startswith(_BOMS) and not _DECLARED_CHARSET_RE.search(body):
+        charset = "utf-8"
+    parser = lxml.html.HTMLParser(encoding=charset)
+    try:
+        doc = lxml.html.document_fromstring(body, parser=parser)
+    except lxml.etree.ParserError:
+        # e.g. a body that is only a comment: libxml2 reports "Document is empty"
+        return empty
+    del body
+
+    if ignore_header_footer:
+        anchors = _ANCHORS_OUTSIDE_HF_XPATH(doc)
+    else:
+        anchors = _ANCHORS_XPATH(doc)
+
+    internal_map: Dict[str, set[str]] = defaultdict(set)
+    external_map: Dict[str, set[str]] = defaultdict(set)
+    # source_url is fixed for the page, so urljoin only depends on href_raw
+    joined: Dict[str, str] = {}
+
+    for a in anchors:
         href_raw = (a.get("href") or "").strip()
         if not href_raw:
             continue
 
-        lowered = href_raw.lower()
-        if lowered.startswith("#") or lowered.startswith("javascript:"):
+        if href_raw.startswith(_SKIP_PREFIXES):
             continue
-        if lowered.startswith("mailto:") or lowered.startswith("tel:"):
+        # only mixed-case schemes need the lowercase copy
+        if href_raw[0] in "JjMmTt" and href_raw.lower().startswith(_SKIP_PREFIXES):
             continue
 
-        abs_href = urljoin(source_url, href_raw)
+        abs_href = joined.get(href_raw)
+        if abs_href is None:
+            abs_href = joined[href_raw] = urljoin(source_url, href_raw)
+        abs_netloc = cached_urlparse(abs_href).netloc.lower()
         text = extract_anchor_text(a)
 
-        if is_internal(href_raw) and urlparse(abs_href).netloc.lower() in INTERNAL_HOSTS:
-            internal_map.setdefault(abs_href, set()).add(text)
-        else:
-            if urlparse(abs_href).netloc.lower() in INTERNAL_HOSTS:
-                internal_map.setdefault(abs_href, set()).add(text)
-            else:
-                external_map.setdefault(abs_href, set()).add(text)
+        target = internal_map if abs_netloc in INTERNAL_HOSTS else external_map
+        target[abs_href].add(text)
 
     internal_out = {k: sorted(v) for k, v in internal_map.items()}
     external_out = {k: sorted(v) for k, v in external_map.items()}
 
     return PageLinks(source_url=source_url, internal=internal_out, external=external_out)
+
+
+async def scrape_links(
+    source_url: str,
+    client: httpx.AsyncClient,
+    ignore_header_footer: bool = False,
+) -> PageLinks:
+    """
+    Fetch source_url with the shared client and classify its links.
+
+    Parsing runs in a worker thread so it doesn't stall other in-flight fetches.
+    """
+    body, charset, warning = await _fetch(client, source_url)
+    body_slot = [body]
+    del body
+    page = await asyncio.to_thread(_parse, body_slot, charset, source_url, ignore_header_footer)
+    if warning:
+        page.warnings.append(warning)
+    return page
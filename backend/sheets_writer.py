@@ -1,15 +1,25 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
-import json
+from typing import Dict, List, Optional, Tuple
 import os
+import threading
 from pathlib import Path
-from urllib.parse import urlparse
 
 import gspread
-from gspread.utils import rowcol_to_a1
+import orjson
+from gspread.utils import absolute_range_name, rowcol_to_a1
 from google.oauth2.service_account import Credentials
 
+from utils import cached_urlparse
+
+
+# Authorized once per process; google-auth refreshes the token on the shared session.
+_gc: Optional[gspread.Client] = None
+
+# Background writes run on a threadpool; serialize them so overlapping runs can't
+# interleave clears, resizes and value writes on the same tabs (or race _get_client).
+_write_lock = threading.Lock()
+
 
 def _client_from_env() -> gspread.Client:
     scopes = [
@@ -21,7 +31,7 @@ def _client_from_env() -> gspread.Client:
     key_path = os.environ.get("GSHEETS_KEY_PATH")
 
     if key_json:
-        creds_dict = json.loads(key_json)
+        creds_dict = orjson.loads(key_json)
         creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
     elif key_path and Path(key_path).exists():
         creds = Credentials.from_service_account_file(key_path, scopes=scopes)
@@ -34,16 +44,39 @@ def _client_from_env() -> gspread.Client:
     return gspread.authorize(creds)
 
 
+def _get_client() -> gspread.Client:
+    global _gc
+    if _gc is None:
+        _gc = _client_from_env()
+    return _gc
+
+
 def _ensure_worksheet(sh, title: str) -> gspread.Worksheet:
     try:
         return sh.worksheet(title)
     except gspread.WorksheetNotFound:
-        return sh.add_worksheet(title=title, rows=2000, cols=200)
+        # write_results resizes the grid to fit before writing
+        return sh.add_worksheet(title=title, rows=1, cols=1)
+
+
+def _resize_request(ws: gspread.Worksheet, rows: int, cols: int) -> Dict[str, object]:
+    # Sheets rejects a grid that doesn't leave at least one unfrozen row/column.
+    rows = max(rows, ws.frozen_row_count + 1)
+    cols = max(cols, ws.frozen_col_count + 1)
+    return {
+        "updateSheetProperties": {
+            "properties": {
+                "sheetId": ws.id,
+                "gridProperties": {"rowCount": rows, "columnCount": cols},
+            },
+            "fields": "gridProperties(rowCount,columnCount)",
+        }
+    }
 
 
 def _simplify_internal_display(url: str) -> str:
     try:
-        parsed = urlparse(url)
+        parsed = cached_urlparse(url)
         return parsed.path or "/"
     except Exception:
         return url
@@ -51,11 +84,23 @@ def _simplify_internal_display(url: str) -> str:
 
 def _simplify_external_display(url: str) -> str:
     try:
-        return urlparse(url).netloc or url
+        return cached_urlparse(url).netloc or url
     except Exception:
         return url
 
 
+# Sheets gets sluggish with very many formulas; larger blocks are written as plain URLs.
+MAX_HYPERLINK_ROWS = 50_000
+
+
+def _hyperlink(link: str, display: str) -> str:
+    # A raw quote would end the formula's string literal: percent-encode it in the
+    # URL and double it (the Sheets escape) in the label.
+    link = link.replace('"', "%22")
+    display = display.replace('"', '""')
+    return f'=HYPERLINK("{link}", "{display}")'
+
+
 def _build_block_columns(
     source_url: str,
     header_left: str,
@@ -72,18 +117,15 @@ def _build_block_columns(
         rows.append(["(no links found)", ""])
         return rows
 
-    for link in sorted(data.keys()):
-        anchors = [t for t in data[link] if t]
-        anchor_text = " | ".join(anchors)
-
-        if simplify_links:
-            display = _simplify_internal_display(link)
-            cell = f'=HYPERLINK("{link}", "{display}")'
-        else:
-            display = _simplify_external_display(link)
-            cell = f'=HYPERLINK("{link}", "{display}")'
+    if len(data) > MAX_HYPERLINK_ROWS:
+        rows.extend([link, " | ".join(t for t in data[link] if t)] for link in sorted(data))
+        return rows
 
-        rows.append([cell, anchor_text])
+    simplify = _simplify_internal_display if simplify_links else _simplify_external_display
+    rows.extend(
+        [_hyperlink(link, simplify(link)), " | ".join(t for t in data[link] if t)]
+        for link in sorted(data)
+    )
 
     return rows
 
@@ -93,17 +135,29 @@ def write_results(
     internal_blocks: List[Tuple[str, Dict[str, List[str]]]],
     external_blocks: List[Tuple[str, Dict[str, List[str]]]],
 ) -> None:
-    gc = _client_from_env()
+    with _write_lock:
+        _write_results(spreadsheet_id, internal_blocks, external_blocks)
+
+
+def _write_results(
+    spreadsheet_id: str,
+    internal_blocks: List[Tuple[str, Dict[str, List[str]]]],
+    external_blocks: List[Tuple[str, Dict[str, List[str]]]],
+) -> None:
+    gc = _get_client()
     sh = gc.open_by_key(spreadsheet_id)
 
     ws_int = _ensure_worksheet(sh, "INTERNAL_LINKS")
     ws_ext = _ensure_worksheet(sh, "EXTERNAL_LINKS")
 
-    ws_int.clear()
-    ws_ext.clear()
+    # One clear, one resize and one values write cover both tabs: 3 API calls per run.
+    sh.values_batch_clear(body={"ranges": [ws_int.title, ws_ext.title]})
+
+    value_ranges: List[Dict[str, object]] = []
 
     # INTERNAL (horizontal, no spacer)
     col_cursor = 1  # column A
+    int_rows = 0
     for source_url, data in internal_blocks:
         block = _build_block_columns(
             source_url=source_url,
@@ -113,11 +167,14 @@ def write_results(
             simplify_links=True,
         )
         start_cell = rowcol_to_a1(1, col_cursor)
-        ws_int.update(start_cell, block, value_input_option="USER_ENTERED")
+        value_ranges.append({"range": absolute_range_name(ws_int.title, start_cell), "values": block})
+        int_rows = max(int_rows, len(block))
         col_cursor += 2  # <-- NO spacer column
+    int_cols = col_cursor - 1
 
     # EXTERNAL (horizontal, no spacer)
     col_cursor = 1
+    ext_rows = 0
     for source_url, data in external_blocks:
         block = _build_block_columns(
             source_url=source_url,
@@ -127,5 +184,18 @@ def write_results(
             simplify_links=False,
         )
         start_cell = rowcol_to_a1(1, col_cursor)
-        ws_ext.update(start_cell, block, value_input_option="USER_ENTERED")
+        value_ranges.append({"range": absolute_range_name(ws_ext.title, start_cell), "values": block})
+        ext_rows = max(ext_rows, len(block))
         col_cursor += 2  # <-- NO spacer column
+    ext_cols = col_cursor - 1
+
+    # Size both grids exactly once so the values write never has to expand them.
+    sh.batch_update({
+        "requests": [
+            _resize_request(ws_int, int_rows, int_cols),
+            _resize_request(ws_ext, ext_rows, ext_cols),
+        ]
+    })
+
+    if value_ranges:
+        sh.values_batch_update({"valueInputOption": "USER_ENTERED", "data": value_ranges})
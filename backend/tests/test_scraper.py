@@ -0,0 +1,146 @@
+import asyncio
+import tracemalloc
+
+import httpx
+
+import scraper
+from scraper import normalize_to_casinos, scrape_links
+
+
+def _scrape(handler, url="https://www.casinos.com/us/slots"):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await scrape_links(url, client=client)
+
+    return asyncio.run(run())
+
+
+def test_unknown_header_charset_falls_back_to_meta():
+    body = '<html><head><meta charset="utf-8"></head><body><a href="/us/poker">Póker</a></body></html>'
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/html; charset=utf8mb4"},
+            content=body.encode("utf-8"),
+        )
+
+    page = _scrape(handler)
+    assert page.internal == {"https://www.casinos.com/us/poker": ["Póker"]}
+
+
+def test_header_charset_is_passed_to_lxml_as_sent():
+    body = '<html><body><a href="/jp/slots">スロット</a></body></html>'
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/html; charset=EUC-JP"},
+            content=body.encode("euc_jp"),
+        )
+
+    page = _scrape(handler)
+    assert page.internal == {"https://www.casinos.com/jp/slots": ["スロット"]}
+
+
+def test_non_html_response_is_skipped_with_warning():
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "application/pdf"}, content=b"%PDF-1.7")
+
+    page = _scrape(handler)
+    assert page.internal == {} and page.external == {}
+    assert page.warnings == ["skipped non-HTML (application/pdf)"]
+
+
+def test_oversized_body_is_truncated_with_warning(monkeypatch):
+    monkeypatch.setattr(scraper, "MAX_BODY_BYTES", 2_000_000)
+    body = b'<html><body><a href="/us/poker">Poker</a>' + b" " * 3_000_000 + b"</body></html>"
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=body)
+
+    page = _scrape(handler)
+    assert page.internal == {"https://www.casinos.com/us/poker": ["Poker"]}
+    assert page.warnings == ["truncated at 2 MB"]
+
+
+def test_normalize_to_casinos_canonicalizes_equivalent_inputs():
+    expected = "https://www.casinos.com/us/slots"
+    for raw in ("us/slots", "/us/slots/", "https://www.casinos.com/us/slots#x", "www.casinos.com/us/slots/"):
+        assert normalize_to_casinos(raw) == expected
+
+
+def test_normalize_to_casinos_keeps_query_and_root():
+    assert normalize_to_casinos("/us/slots/?page=2#top") == "https://www.casinos.com/us/slots?page=2"
+    assert normalize_to_casinos("/") == "https://www.casinos.com/"
+
+
+def test_anchor_text_separates_nested_inline_elements():
+    body = (
+        '<html><body>'
+        '<a href="/a"><span>Foo</span><span>Bar</span></a>'
+        '<a href="/b">Foo<br>Bar</a>'
+        '<a href="/c">Top <b>10</b><!-- note --> slots</a>'
+        '</body></html>'
+    )
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=body.encode())
+
+    page = _scrape(handler)
+    assert page.internal == {
+        "https://www.casinos.com/a": ["Foo Bar"],
+        "https://www.casinos.com/b": ["Foo Bar"],
+        "https://www.casinos.com/c": ["Top 10 slots"],
+    }
+
+
+def test_body_without_elements_is_an_empty_page():
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=b"<!-- maintenance -->\n")
+
+    page = _scrape(handler)
+    assert page.internal == {} and page.external == {} and page.warnings == []
+
+
+def test_undeclared_encoding_defaults_to_utf8():
+    body = '<html><body><a href="/us/poker">Póker</a></body></html>'
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=body.encode("utf-8"))
+
+    page = _scrape(handler)
+    assert page.internal == {"https://www.casinos.com/us/poker": ["Póker"]}
+
+
+def test_meta_charset_wins_without_header_charset():
+    body = '<html><head><meta charset="iso-8859-1"></head><body><a href="/us/poker">Póker</a></body></html>'
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=body.encode("latin-1"))
+
+    page = _scrape(handler)
+    assert page.internal == {"https://www.casinos.com/us/poker": ["Póker"]}
+
+
+def test_parse_frees_the_body_once_the_tree_is_built(monkeypatch):
+    size = 5_000_000
+    seen = []
+    select_anchors = scraper._ANCHORS_XPATH
+
+    def traced_select(doc):
+        # runs after document_fromstring; libxml2's tree isn't traced, the body bytes are
+        seen.append(tracemalloc.get_traced_memory()[0])
+        return select_anchors(doc)
+
+    monkeypatch.setattr(scraper, "_ANCHORS_XPATH", traced_select)
+    tracemalloc.start()
+    try:
+        body_slot = [b'<html><body><a href="/a">A</a>' + b" " * size + b"</body></html>"]
+        page = scraper._parse(body_slot, "utf-8", "https://www.casinos.com/", False)
+    finally:
+        tracemalloc.stop()
+
+    assert body_slot == []
+    assert seen and seen[0] < size // 2
+    assert page.internal == {"https://www.casinos.com/a": ["A"]}
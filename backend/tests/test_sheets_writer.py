@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import sheets_writer
+from sheets_writer import _build_block_columns, _hyperlink, _resize_request
+
+
+def _grid(request):
+    return request["updateSheetProperties"]["properties"]["gridProperties"]
+
+
+def test_resize_keeps_an_unfrozen_row_and_column():
+    ws = SimpleNamespace(id=7, frozen_row_count=3, frozen_col_count=2)
+    assert _grid(_resize_request(ws, 3, 2)) == {"rowCount": 4, "columnCount": 3}
+
+
+def test_resize_uses_exact_size_when_nothing_is_frozen():
+    ws = SimpleNamespace(id=7, frozen_row_count=0, frozen_col_count=0)
+    assert _grid(_resize_request(ws, 0, 0)) == {"rowCount": 1, "columnCount": 1}
+    assert _grid(_resize_request(ws, 12, 4)) == {"rowCount": 12, "columnCount": 4}
+
+
+def test_hyperlink_plain():
+    assert _hyperlink("https://www.casinos.com/us/slots", "/us/slots") == (
+        '=HYPERLINK("https://www.casinos.com/us/slots", "/us/slots")'
+    )
+
+
+def test_hyperlink_escapes_quotes():
+    assert _hyperlink('https://ext.com/a"b', 'say "hi"') == (
+        '=HYPERLINK("https://ext.com/a%22b", "say ""hi""")'
+    )
+
+
+def _block(data):
+    return _build_block_columns(
+        source_url="https://www.casinos.com/us/slots",
+        header_left="INTERNAL LINK",
+        header_right="ANCHOR TEXT",
+        data=data,
+        simplify_links=True,
+    )
+
+
+def test_block_rows_use_hyperlinks_up_to_the_limit(monkeypatch):
+    monkeypatch.setattr(sheets_writer, "MAX_HYPERLINK_ROWS", 2)
+    data = {"https://www.casinos.com/b": ["B", ""], "https://www.casinos.com/a": ["A1", "A2"]}
+    assert _block(data)[2:] == [
+        ['=HYPERLINK("https://www.casinos.com/a", "/a")', "A1 | A2"],
+        ['=HYPERLINK("https://www.casinos.com/b", "/b")', "B"],
+    ]
+
+
+def test_block_rows_fall_back_to_plain_urls_over_the_limit(monkeypatch):
+    monkeypatch.setattr(sheets_writer, "MAX_HYPERLINK_ROWS", 2)
+    data = {f"https://www.casinos.com/{c}": [c.upper()] for c in "cab"}
+    assert _block(data)[2:] == [
+        ["https://www.casinos.com/a", "A"],
+        ["https://www.casinos.com/b", "B"],
+        ["https://www.casinos.com/c", "C"],
+    ]
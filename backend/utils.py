@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from urllib.parse import ParseResult, urlparse
+
+
+@lru_cache(maxsize=8192)
+def cached_urlparse(url: str) -> ParseResult:
+    """
+    urlparse memoized across the scraper and the sheet writer, which see the same links.
+    """
+    return urlparse(url)